@@ -1,7 +1,8 @@
-import json, os, copy, torch
+import argparse, json, os, copy, torch
 from tqdm import tqdm
 from transformers import AutoTokenizer, AutoModel
 from scripts.utils import download_blob, upload_blob
+from scripts.shard_embeddings import embeddings_file_name, merge_embeddings, shard_artists
 
 def mean_pooling(model_output, attention_mask):
     """
@@ -64,22 +65,43 @@ def add_embeddings(data, min_songs=8):
                 
     return data_loop
 
-def main():
+def main(shard_index=0, num_shards=1, run_locally=False):
     """
     Download scraped files with lyrics, generate embeddings, upload embeddings to GCS
+
+    When sharded, only this shard's artists are embedded and uploaded to their own file
     """
     
-    download_blob('data/artist_albums_lyrics_0607.json', '/tmp/artist_albums_lyrics_0607.json')
+    ### Each shard gets its own copy so shards on one machine don't overwrite each other
+    lyrics_path = f'/tmp/artist_albums_lyrics_0607_shard{shard_index}.json'
+    download_blob('data/artist_albums_lyrics_0607.json', lyrics_path, run_locally=run_locally)
 
-    with open('/tmp/artist_albums_lyrics_0607.json', 'r') as f:
+    with open(lyrics_path, 'r') as f:
         data = json.load(f)
 
+    data = {artist: data[artist] for artist in shard_artists(data, shard_index, num_shards)}
     data_emb = add_embeddings(data)
 
-    with open('artist_albums_lyrics_embs_0608.json', 'w') as f:
+    file_name = embeddings_file_name(shard_index, num_shards)
+    with open(file_name, 'w') as f:
         json.dump(data_emb, f, indent=4)
 
-    upload_blob('artist_albums_lyrics_embs_0608.json', folder_name='data')
+    upload_blob(file_name, folder_name='data', run_locally=run_locally)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--task', default='gen_embeds')
+    parser.add_argument('--shard-index', type=int, default=0)
+    parser.add_argument('--num-shards', type=int, default=1)
+    parser.add_argument('--run-locally', action='store_true')
+    ### The AI platform adds its own arguments, e.g. `--job-dir`
+    args, _ = parser.parse_known_args()
+    if args.num_shards < 1:
+        parser.error('--num-shards must be at least 1')
+    if not 0 <= args.shard_index < args.num_shards:
+        parser.error('--shard-index must be between 0 and --num-shards - 1')
+
+    if args.task == 'merge_embeds':
+        merge_embeddings(args.num_shards, run_locally=args.run_locally)
+    else:
+        main(args.shard_index, args.num_shards, run_locally=args.run_locally)
@@ -13,6 +13,36 @@ from PIL import Image, ImageEnhance
 from mpl_toolkits.mplot3d import Axes3D
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 
+ARTISTS_IMAGES = [
+	('BROCKHAMPTON', 'brock.png'),
+	('Frank Ocean', 'frank.png'),
+	('The Front Bottoms', 'frontbottoms.png'),
+	('Rich Brian', 'brian.png'),
+	('Action Bronson', 'action.png'),
+	('Joji', 'joji.png'),
+	('Rex Orange County', 'rex.png'),
+	('Injury Reserve', 'ir.png'),
+	('Smino', 'smino.png'),
+	('Justin Bieber', 'jb.png'),
+	('A Tribe Called Quest', 'atcq.png'),
+	('Vince Staples', 'vs.png'),
+	('Earl Sweatshirt', 'earl.png'),
+	('MF DOOM', 'MF.png'),
+	('The Notorious B.I.G.', 'big.png'),
+	('Flatbush Zombies', 'flatbush.png'),
+	('Jack Johnson', 'jack.png'),
+	('Hobo Johnson', 'hobo.png'),
+	('100 Gecs', '100gecs.jpg'),
+	('Denzel Curry', 'denzel.png'),
+	('JPEGMAFIA', 'jpegmafia.png'),
+	('John Mayer', 'mayer.png'),
+	('Tyler, the Creator', 'tyler.png'),
+	('Amine', 'amine.png'),
+	('Kanye West', 'kw.png'),
+	('Mac Miller', 'mac.png'),
+]
+
+
 def load_data():
 	"""
 	Load embeddings generated with `generate_embeddings.py`
@@ -48,6 +78,19 @@ def load_data():
 	return all_songs
 
 
+def download_album_image(album):
+	"""
+	Download an album cover to `images/` if it is not found locally
+
+	Returns the local path of the image
+	"""
+	path = f'images/{album.split("/")[-1]}'
+	if not os.path.exists(path):
+		with open(path, "wb") as f:
+			f.write(requests.get(album).content)
+	return path
+
+
 def getImage(path, size=(100,100), fade=False):
 	"""
 	Takes an image path and returns an `OffsetImage` object.
@@ -92,49 +135,16 @@ def make_plot(all_songs):
 	plt.axis('off')
 
 	sns.despine()
-	
-	artists_images = [('BROCKHAMPTON', 'brock.png'), 
-			  ('Frank Ocean', 'frank.png'), 
-			  ('The Front Bottoms', 'frontbottoms.png'), 
-			  ('Rich Brian', 'brian.png'), 
-			  ('Action Bronson', 'action.png'),
-			  ('Joji', 'joji.png'),
-			  ('Rex Orange County', 'rex.png'),
-			  ('Injury Reserve', 'ir.png'),
-			  ('Smino', 'smino.png'),
-			  ('Justin Bieber', 'jb.png'),
-			  ('A Tribe Called Quest', 'atcq.png'),
-			  ('Vince Staples', 'vs.png'),
-			  ('Earl Sweatshirt', 'earl.png'),
-			  ('MF DOOM', 'MF.png'),
-			  ('The Notorious B.I.G.', 'big.png'),
-			  ('Flatbush Zombies', 'flatbush.png'),
-			  ('Jack Johnson', 'jack.png'), 
-			  ('Hobo Johnson', 'hobo.png'),
-			  ('100 Gecs', '100gecs.jpg'),
-			  ('Denzel Curry', 'denzel.png'), 
-			  ('JPEGMAFIA', 'jpegmafia.png'), 
-			  ('John Mayer', 'mayer.png'), 
-			  ('Tyler, the Creator', 'tyler.png'),
-			  ('Amine', 'amine.png'),
-			  ('Kanye West', 'kw.png'),
-			  ('Mac Miller', 'mac.png')]
 
 
 	### Plot songs
-	for artist, image_path in artists_images:
+	for artist, image_path in ARTISTS_IMAGES:
 		artist_pca_1 = [i['pca_emb'][0] for i in all_songs if artist == i['artist']]
 		artist_pca_2 = [i['pca_emb'][1] for i in all_songs if artist == i['artist']]
 		artist_albums = [i['album'] for i in all_songs if artist == i['artist']]
 
-		### Download all the artist's album images if they are not found locally
-		for album in set(artist_albums):
-			if not os.path.exists(f'images/{album.split("/")[-1]}'):
-				with open(f'images/{album.split("/")[-1]}', "wb") as f:
-					f.write(requests.get(album).content)
-
 		### Create mapping of album links to pixel arrays
-		artist_albums_mapping = {album: getImage(f"images/{album.split('/')[-1]}", 
+		artist_albums_mapping = {album: getImage(download_album_image(album), 
 												size=(50,50))
 									for album in set(artist_albums)}
 
@@ -145,7 +155,7 @@ def make_plot(all_songs):
 				ax.add_artist(ab)
 
 	### Plot artists after songs so artists sit on top of album images
-	for artist, image_path in artists_images:
+	for artist, image_path in ARTISTS_IMAGES:
 		artist_pca_1 = [i['pca_emb'][0] for i in all_songs if artist == i['artist']]
 		artist_pca_2 = [i['pca_emb'][1] for i in all_songs if artist == i['artist']]
 		try:
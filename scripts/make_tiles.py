@@ -0,0 +1,364 @@
+import argparse
+import json
+import math
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from PIL import Image, ImageEnhance
+from sklearn.decomposition import PCA
+from scripts.make_plot import load_data, download_album_image, ARTISTS_IMAGES
+
+TILE_SIZE = 256
+DENSITY_COLOR = (40, 40, 40)
+
+
+def fit_projection(all_songs):
+	"""
+	Fit a 2 component PCA on the embeddings of the songs being tiled
+
+	`load_data` fits on every song before its lyrics filter, so the tile layout
+		can differ slightly from `plot.png`. The fitted mean and components are
+		stored in the manifest so incremental updates project songs into the
+		same space instead of refitting
+	"""
+	pca = PCA(n_components=2).fit([song['embedding'] for song in all_songs])
+	return {'mean': pca.mean_.tolist(), 'components': pca.components_.tolist()}
+
+
+def project_songs(songs, projection):
+	"""
+	Set each song's `pca_emb` using a projection from `fit_projection`
+	"""
+	if not songs:
+		return
+	embs = np.asarray([song['embedding'] for song in songs])
+	pca_embs = (embs - np.asarray(projection['mean'])) @ np.asarray(projection['components']).T
+	for song, pca_emb in zip(songs, pca_embs):
+		song.update({'pca_emb': pca_emb.tolist()})
+
+
+def song_xy(song):
+	"""
+	Return the (x, y) plot coordinates of a song
+
+	Matches `make_plot`, which puts the second PCA component on the x axis
+	"""
+	return song['pca_emb'][1], song['pca_emb'][0]
+
+
+def get_bounds(all_songs, margin=.05):
+	"""
+	Compute a square extent covering every song, padded by `margin` on each side
+
+	The extent is stored in the manifest so incremental updates keep the same
+		tile grid
+	"""
+	xs, ys = zip(*[song_xy(song) for song in all_songs])
+	side = max(max(xs) - min(xs), max(ys) - min(ys)) * (1 + 2 * margin) or 1.
+	center_x, center_y = (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+	return {'min_x': center_x - side / 2, 'max_y': center_y + side / 2, 'side': side}
+
+
+def in_bounds(song, bounds):
+	x, y = song_xy(song)
+	return (bounds['min_x'] <= x < bounds['min_x'] + bounds['side'] and
+			bounds['max_y'] - bounds['side'] < y <= bounds['max_y'])
+
+
+def world_to_pixel(x, y, zoom, bounds, tile_size=TILE_SIZE):
+	"""
+	Convert plot coordinates to global pixel coordinates at `zoom`
+
+	Zoom `z` is a grid of 2**z by 2**z tiles with the origin in the top left (XYZ)
+	"""
+	scale = tile_size * 2 ** zoom / bounds['side']
+	return (x - bounds['min_x']) * scale, (bounds['max_y'] - y) * scale
+
+
+def touched_tiles(px, py, zoom, radius, tile_size=TILE_SIZE):
+	"""
+	List the (x, y) indices of tiles overlapped by a square of half-width `radius`
+		centered on the pixel `(px, py)`
+	"""
+	n = 2 ** zoom
+	x0, x1 = max(int((px - radius) // tile_size), 0), min(int((px + radius) // tile_size), n - 1)
+	y0, y1 = max(int((py - radius) // tile_size), 0), min(int((py + radius) // tile_size), n - 1)
+	return [(tx, ty) for tx in range(x0, x1 + 1) for ty in range(y0, y1 + 1)]
+
+
+def get_artist_centers(all_songs):
+	"""
+	Center point of each pictured artist's songs, used for the artist markers
+	"""
+	artist_centers = {}
+	for artist, _ in ARTISTS_IMAGES:
+		artist_xy = [song_xy(i) for i in all_songs if artist == i['artist']]
+		if artist_xy:
+			artist_centers[artist] = np.mean(artist_xy, axis=0).tolist()
+	return artist_centers
+
+
+def build_tile_jobs(all_songs, artist_centers, album_paths, zoom, bounds, out_dir,
+					detail_zoom=4, tile_size=TILE_SIZE, album_size=50,
+					artist_size=250, marker_size=96):
+	"""
+	Group songs into the tiles they fall on at `zoom`
+
+	Below `detail_zoom` songs are kept as points for a density layer with an
+		un-faded artist marker on top. From `detail_zoom` on, each song is an
+		album cover and artists are faded like they are in `make_plot`.
+
+	Only tiles that contain songs or part of an artist marker get a job.
+		Returns a dict keyed by (zoom, x, y)
+	"""
+	detail = zoom >= detail_zoom
+	radius = album_size / 2 if detail else 0
+	jobs = {}
+
+	def get_job(tx, ty):
+		return jobs.setdefault((zoom, tx, ty), {
+			'path': os.path.join(out_dir, str(zoom), str(tx), f'{ty}.png'),
+			'tile_size': tile_size,
+			'album_size': album_size,
+			'points': [],
+			'covers': [],
+			'artists': [],
+		})
+
+	for song in all_songs:
+		px, py = world_to_pixel(*song_xy(song), zoom, bounds, tile_size)
+		for tx, ty in touched_tiles(px, py, zoom, radius, tile_size):
+			job = get_job(tx, ty)
+			local_xy = (px - tx * tile_size, py - ty * tile_size)
+			if detail:
+				job['covers'].append(local_xy + (album_paths[song['album']],))
+			else:
+				job['points'].append(local_xy)
+
+	### Markers get every tile they overlap so they aren't cut off at empty tiles
+	size = artist_size if detail else marker_size
+	for artist, image_path in ARTISTS_IMAGES:
+		if artist not in artist_centers:
+			continue
+		px, py = world_to_pixel(*artist_centers[artist], zoom, bounds, tile_size)
+		for tx, ty in touched_tiles(px, py, zoom, size / 2, tile_size):
+			get_job(tx, ty)['artists'].append((px - tx * tile_size, py - ty * tile_size,
+												f'images/{image_path}', size, detail))
+	return jobs
+
+
+@lru_cache(maxsize=None)
+def load_thumbnail(path, size, fade=False):
+	"""
+	Load an image as an RGBA thumbnail, cached per worker process
+
+	If `fade`, reduce alpha value like `make_plot.getImage`
+	"""
+	try:
+		img = Image.open(path)
+	except:
+		return None
+
+	img = img.convert('RGBA')
+	img.thumbnail((size, size))
+
+	if fade:
+		alpha = img.split()[3]
+		alpha = ImageEnhance.Brightness(alpha).enhance(.7)
+		img.putalpha(alpha)
+	return img
+
+
+def draw_density(points, tile_size=TILE_SIZE, bin_size=4, saturation=20):
+	"""
+	Render song points as a density layer
+
+	Counts are scaled against a fixed `saturation` instead of the tile's max so
+		neighbouring tiles match and re-rendered tiles line up with old ones
+	"""
+	bins = tile_size // bin_size
+	xs, ys = zip(*points)
+	counts, _, _ = np.histogram2d(ys, xs, bins=bins, range=[[0, tile_size], [0, tile_size]])
+	alpha = np.clip(np.log1p(counts) / np.log1p(saturation), 0, 1)
+
+	rgba = np.zeros((bins, bins, 4), dtype=np.uint8)
+	rgba[..., :3] = DENSITY_COLOR
+	rgba[..., 3] = (alpha * 255).astype(np.uint8)
+	return Image.fromarray(rgba, 'RGBA').resize((tile_size, tile_size), Image.BILINEAR)
+
+
+def paste_centered(tile, img, x, y):
+	### Floor rather than truncate so negative offsets line up with the neighbouring tile
+	if img is not None:
+		tile.paste(img, (math.floor(x - img.width / 2), math.floor(y - img.height / 2)), img)
+
+
+def render_tile(job):
+	"""
+	Render a single tile from a job made by `build_tile_jobs` and save it
+	"""
+	tile_size = job['tile_size']
+	tile = Image.new('RGBA', (tile_size, tile_size), (0, 0, 0, 0))
+
+	if job['points']:
+		tile = draw_density(job['points'], tile_size)
+
+	for x, y, path in job['covers']:
+		paste_centered(tile, load_thumbnail(path, job['album_size']), x, y)
+
+	### Plot artists after songs so artists sit on top of album images
+	for x, y, path, size, fade in job['artists']:
+		paste_centered(tile, load_thumbnail(path, size, fade), x, y)
+
+	os.makedirs(os.path.dirname(job['path']), exist_ok=True)
+	tile.save(job['path'])
+	return job['path']
+
+
+def song_key(song):
+	"""
+	Identify a song across runs by its Genius url
+	"""
+	return song['url']
+
+
+def get_dirty_tiles(new_songs, artist_centers, old_artist_centers, bounds, max_zoom=6,
+					detail_zoom=4, tile_size=TILE_SIZE, album_size=50, artist_size=250,
+					marker_size=96):
+	"""
+	Collect the (zoom, x, y) tiles touched by new songs or by artist markers that moved
+
+	Uses the same footprints as `build_tile_jobs`
+	"""
+	dirty = set()
+	for zoom in range(max_zoom + 1):
+		if zoom >= detail_zoom:
+			song_radius, artist_radius = album_size / 2, artist_size / 2
+		else:
+			song_radius, artist_radius = 0, marker_size / 2
+		for song in new_songs:
+			px, py = world_to_pixel(*song_xy(song), zoom, bounds, tile_size)
+			dirty.update((zoom,) + t for t in touched_tiles(px, py, zoom, song_radius, tile_size))
+		for artist, center in artist_centers.items():
+			old_center = old_artist_centers.get(artist)
+			if old_center == center:
+				continue
+			for xy in filter(None, [old_center, center]):
+				px, py = world_to_pixel(*xy, zoom, bounds, tile_size)
+				dirty.update((zoom,) + t for t in touched_tiles(px, py, zoom, artist_radius, tile_size))
+	return dirty
+
+
+def remove_stale_tiles(old_tiles, tiles, out_dir):
+	"""
+	Remove tiles left over from the previous grid that no longer hold anything
+	"""
+	for tile in set(old_tiles) - set(tiles):
+		tile_path = os.path.join(out_dir, *tile.split('/')) + '.png'
+		if os.path.exists(tile_path):
+			os.remove(tile_path)
+
+
+def make_tiles(all_songs, out_dir='tiles', rebuild=False, max_zoom=6, detail_zoom=4,
+				tile_size=TILE_SIZE, album_size=50, artist_size=250, marker_size=96,
+				processes=None):
+	"""
+	Render the songs as a zoomable XYZ tile pyramid in `out_dir/{z}/{x}/{y}.png`
+		instead of the single figure made by `make_plot`. Only tiles holding songs
+		or artist markers are rendered.
+
+	Tiles are rendered in parallel across `processes` worker processes. A
+		`manifest.json` records the tile grid, the PCA projection and the rendered
+		songs. On the next run, songs missing from the manifest are new and only
+		the tiles they touch, or where an artist marker moved, are re-rendered.
+		Everything is rendered again if `rebuild` is set, the tile settings
+		changed, songs were removed or a new song falls outside the grid.
+
+	Songs are placed with the projection saved in the manifest rather than the
+		`pca_emb` from `load_data`, which refits PCA and moves every song
+	"""
+	settings = {'tile_size': tile_size, 'max_zoom': max_zoom, 'detail_zoom': detail_zoom,
+				'album_size': album_size, 'artist_size': artist_size, 'marker_size': marker_size}
+	manifest_path = os.path.join(out_dir, 'manifest.json')
+
+	old_tiles = []
+	manifest = None
+	if os.path.exists(manifest_path):
+		with open(manifest_path, 'r') as f:
+			manifest = json.load(f)
+		old_tiles = manifest['tiles']
+		if rebuild:
+			manifest = None
+		elif ('projection' not in manifest or 'songs' not in manifest or
+				any(manifest.get(k) != v for k, v in settings.items())):
+			print('Tile settings changed, rendering all tiles')
+			manifest = None
+
+	song_keys = set(song_key(song) for song in all_songs)
+	new_songs = []
+	if manifest:
+		rendered_keys = set(manifest['songs'])
+		if rendered_keys - song_keys:
+			print('Songs were removed, rendering all tiles')
+			manifest = None
+		else:
+			new_songs = [song for song in all_songs if song_key(song) not in rendered_keys]
+
+	### Keep the saved projection so existing songs stay where they were drawn
+	projection = manifest['projection'] if manifest else fit_projection(all_songs)
+	project_songs(all_songs, projection)
+
+	if manifest and not all(in_bounds(song, manifest['bounds']) for song in new_songs):
+		print('New songs fall outside the tile grid, rendering all tiles')
+		manifest = None
+
+	bounds = manifest['bounds'] if manifest else get_bounds(all_songs)
+
+	### Download covers up front so workers only read from disk
+	album_paths = {album: download_album_image(album)
+					for album in set(i['album'] for i in all_songs)}
+	artist_centers = get_artist_centers(all_songs)
+
+	jobs = {}
+	for zoom in range(max_zoom + 1):
+		jobs.update(build_tile_jobs(all_songs, artist_centers, album_paths, zoom, bounds,
+									out_dir, detail_zoom=detail_zoom, tile_size=tile_size,
+									album_size=album_size, artist_size=artist_size,
+									marker_size=marker_size))
+
+	tiles = sorted('/'.join(map(str, key)) for key in jobs)
+	remove_stale_tiles(old_tiles, tiles, out_dir)
+
+	if manifest:
+		dirty = get_dirty_tiles(new_songs, artist_centers, manifest['artist_centers'], bounds,
+								max_zoom=max_zoom, detail_zoom=detail_zoom, tile_size=tile_size,
+								album_size=album_size, artist_size=artist_size,
+								marker_size=marker_size)
+		to_render = [job for key, job in jobs.items() if key in dirty]
+	else:
+		to_render = list(jobs.values())
+
+	print(f'Rendering {len(to_render)} of {len(jobs)} tiles')
+	with ProcessPoolExecutor(max_workers=processes) as executor:
+		list(executor.map(render_tile, to_render, chunksize=16))
+
+	manifest = dict(settings, bounds=bounds, projection=projection, artist_centers=artist_centers,
+					songs=sorted(song_keys), tiles=tiles)
+	with open(manifest_path, 'w') as f:
+		json.dump(manifest, f, indent=4)
+
+
+def main(rebuild=False):
+	"""
+	Load the embeddings and update the tiles, only re-rendering tiles touched by new
+		songs unless `rebuild` is set
+	"""
+	all_songs = load_data()
+	print('Loaded data, making tiles')
+	make_tiles(all_songs, rebuild=rebuild)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--rebuild', action='store_true')
+	main(rebuild=parser.parse_args().rebuild)
@@ -0,0 +1,37 @@
+import json
+from scripts.utils import download_blob, upload_blob
+
+def shard_artists(artists, shard_index=0, num_shards=1):
+    """
+    Pick the artists handled by one shard
+
+    Artists are sorted first so every shard job splits the list the same way
+    """
+    return sorted(artists)[shard_index::num_shards]
+
+def embeddings_file_name(shard_index=0, num_shards=1):
+    """
+    Name of the embeddings file written by a shard, or the merged file if not sharded
+    """
+    if num_shards == 1:
+        return 'artist_albums_lyrics_embs_0608.json'
+    return f'artist_albums_lyrics_embs_0608_shard{shard_index}of{num_shards}.json'
+
+def merge_embeddings(num_shards, run_locally=False):
+    """
+    Download the embeddings from each shard and combine them into one file
+
+    Shards hold disjoint sets of artists so their dictionaries can be merged directly
+    """
+    data_emb = {}
+    for shard_index in range(num_shards):
+        file_name = embeddings_file_name(shard_index, num_shards)
+        download_blob(f'data/{file_name}', f'/tmp/{file_name}', run_locally=run_locally)
+        with open(f'/tmp/{file_name}', 'r') as f:
+            data_emb.update(json.load(f))
+
+    file_name = embeddings_file_name()
+    with open(file_name, 'w') as f:
+        json.dump(data_emb, f, indent=4)
+
+    upload_blob(file_name, folder_name='data', run_locally=run_locally)
@@ -1,5 +1,10 @@
 import os
-from google.cloud import storage
+import shutil
+### google-cloud-storage is only needed when files go to GCS
+try:
+    from google.cloud import storage
+except ImportError:
+    storage = None
 
 def upload_blob(source_file_name, 
                 folder_name = None, 
@@ -7,17 +12,29 @@ def upload_blob(source_file_name,
                 run_locally=False):
     """
     Uploads a file to Google Cloud Storage
+
+    If `run_locally`, the file is copied to the same location on disk instead
     """
     
-    storage_client = storage.Client()
-
-    bucket = storage_client.get_bucket(bucket_name)
     ### If user specifies a specific folder, append that
     if folder_name:
         blob_location = f'{folder_name}/{source_file_name}'
     else:
         blob_location = f'{source_file_name}'
 
+    if run_locally:
+        ### Without a folder the file is already where it would be uploaded to
+        if os.path.abspath(blob_location) == os.path.abspath(source_file_name):
+            return
+        os.makedirs(os.path.dirname(blob_location) or '.', exist_ok=True)
+        shutil.copyfile(source_file_name, blob_location)
+        print(f"File {source_file_name} copied to {blob_location}.")
+        return
+
+    storage_client = storage.Client()
+
+    bucket = storage_client.get_bucket(bucket_name)
+
     ### Upload the file
     blob = bucket.blob(blob_location)
     blob.upload_from_filename(source_file_name)
@@ -30,7 +47,14 @@ def download_blob(source_blob_name,
                     folder=False):
     """
     Downloads a file from Google Cloud Storage
+
+    If `run_locally`, the blob name is read as a path on disk and copied instead
     """
+    if run_locally:
+        shutil.copyfile(source_blob_name, destination_file_name)
+        print(f"File {source_blob_name} copied to {destination_file_name}.")
+        return
+
     storage_client = storage.Client()
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(source_blob_name)
@@ -0,0 +1,51 @@
+import datetime
+import logging
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+def run_module(module_name, args):
+	"""
+	Run `module_name` as `__main__` with `args`, like the AI platform does
+	"""
+	sys.argv = [module_name] + args
+	runpy.run_module(module_name, run_name='__main__', alter_sys=True)
+
+class LocalExecutor:
+	"""
+	Run jobs in a local process pool instead of on the AI platform
+
+	Shares its interface with `AIPlatformExecutor`. Jobs get `--run-locally`
+		so scripts read and write files on disk instead of GCS. Machine type
+		and accelerator arguments are ignored.
+	"""
+	def __init__(self, processes=None, package='scripts'):
+		self.pool = ProcessPoolExecutor(max_workers=processes)
+		self.package = package
+		self.jobs = {}
+
+	def submit(self, script_name, task_name, job_name=None, extra_args=None, **job_kwargs):
+		if not job_name:
+			job_name = task_name+"_" + datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+
+		args = ['--task', task_name, '--run-locally'] + (extra_args or [])
+		self.jobs[job_name] = self.pool.submit(run_module, f'{self.package}.{script_name}', args)
+		return job_name
+
+	def get_state(self, job_name):
+		### Jobs from another process, e.g. before a restart, can't be tracked
+		if job_name not in self.jobs:
+			logging.error(f'Job {job_name} was not found')
+			return 'FAILED'
+		job = self.jobs[job_name]
+		if job.cancelled():
+			return 'CANCELLED'
+		if not job.done():
+			return 'RUNNING' if job.running() else 'QUEUED'
+		if job.exception() is not None:
+			logging.error(f'{job_name} failed: {job.exception()!r}')
+			return 'FAILED'
+		return 'SUCCEEDED'
+
+	def shutdown(self):
+		self.pool.shutdown()
@@ -0,0 +1,142 @@
+import datetime
+import json
+import os
+import time
+
+TERMINAL_STATES = ('SUCCEEDED', 'FAILED', 'CANCELLED')
+
+def save_shards(shards, shards_path):
+	os.makedirs(os.path.dirname(shards_path) or '.', exist_ok=True)
+	with open(shards_path, 'w') as f:
+		json.dump(shards, f, indent=4)
+
+def load_shards(shards_path):
+	with open(shards_path, 'r') as f:
+		return json.load(f)
+
+def submit_shards(executor, script_name, task_name, merge_task_name, num_shards, shards_path,
+				extra_args=None, **job_kwargs):
+	"""
+	Submit one job per shard of the artist list and save the job names to `shards_path`
+
+	Each job gets `--shard-index` and `--num-shards` so the script can pick its
+		own artists. Shards whose submission failed are recorded as `FAILED`.
+		Returns the saved shard record
+	"""
+	if num_shards < 1:
+		raise ValueError(f'num_shards must be at least 1, got {num_shards}')
+
+	timestamp = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+	jobs = []
+	for shard_index in range(num_shards):
+		shard_args = ['--shard-index', str(shard_index), '--num-shards', str(num_shards)]
+		jobs.append(executor.submit(script_name, task_name,
+							job_name=f'{task_name}_shard{shard_index}of{num_shards}_{timestamp}',
+							extra_args=shard_args + (extra_args or []),
+							**job_kwargs))
+
+	shards = {
+		'script_name': script_name,
+		'merge_task_name': merge_task_name,
+		'num_shards': num_shards,
+		'extra_args': extra_args or [],
+		'jobs': jobs,
+		'states': ['QUEUED' if job_name else 'FAILED' for job_name in jobs],
+		'merge_job': None,
+		'merge_state': None,
+	}
+	save_shards(shards, shards_path)
+	return shards
+
+def is_finished(shards):
+	"""
+	True once a shard has failed or the merge job has finished
+	"""
+	if not all(state in TERMINAL_STATES for state in shards['states']):
+		return False
+	if any(state != 'SUCCEEDED' for state in shards['states']):
+		return True
+	return shards['merge_state'] in TERMINAL_STATES
+
+def check_shards(executor, shards_path):
+	"""
+	Update the states of the shards saved in `shards_path` and submit the merge job
+		once every shard has succeeded
+
+	Safe to re-run, e.g. from a new process after the poller was stopped.
+		Returns the updated shard record
+	"""
+	shards = load_shards(shards_path)
+
+	shards['states'] = [state if state in TERMINAL_STATES or not job_name
+							else executor.get_state(job_name)
+						for job_name, state in zip(shards['jobs'], shards['states'])]
+
+	if all(state == 'SUCCEEDED' for state in shards['states']):
+		if not shards['merge_job']:
+			num_shards = shards['num_shards']
+			shards['merge_job'] = executor.submit(shards['script_name'], shards['merge_task_name'],
+								job_name=f"{shards['merge_task_name']}_{num_shards}_shards_" +
+									datetime.datetime.now().strftime("%y%m%d_%H%M%S"),
+								extra_args=['--num-shards', str(num_shards)] + shards['extra_args'])
+			shards['merge_state'] = 'QUEUED' if shards['merge_job'] else 'FAILED'
+		elif shards['merge_state'] not in TERMINAL_STATES:
+			shards['merge_state'] = executor.get_state(shards['merge_job'])
+
+	save_shards(shards, shards_path)
+	return shards
+
+def wait_for_shards(executor, shards_path, poll_interval=60, max_polls=None):
+	"""
+	Run `check_shards` every `poll_interval` seconds until the shards and merge finish
+
+	Raises `TimeoutError` after `max_polls` checks. The shard record is kept so
+		waiting can be resumed later
+	"""
+	polls = 0
+	while True:
+		shards = check_shards(executor, shards_path)
+		polls += 1
+		print(f"Shard states: {shards['states']}, merge: {shards['merge_state']}")
+		if is_finished(shards):
+			failed = [shard for shard, state in enumerate(shards['states']) if state != 'SUCCEEDED']
+			if failed:
+				print(f'Shards {failed} did not succeed, skipping the merge')
+			return shards
+		if max_polls is not None and polls >= max_polls:
+			raise TimeoutError(f'Shards in {shards_path} still running after {polls} checks')
+		time.sleep(poll_interval)
+
+def run_sharded(executor, script_name, task_name, merge_task_name, num_shards, shards_path,
+				poll_interval=60, max_polls=None, extra_args=None, **job_kwargs):
+	"""
+	Fan a job out across `num_shards` jobs then run `merge_task_name` to combine
+		the per-shard outputs
+
+	Blocks until everything finishes so it must run from a long-lived process.
+		`job_kwargs` only apply to the shard jobs, the merge job runs on the default tier.
+		The merge is skipped if any shard did not succeed.
+
+	Returns the shard states and the state of the merge job
+	"""
+	submit_shards(executor, script_name, task_name, merge_task_name, num_shards, shards_path,
+					extra_args=extra_args, **job_kwargs)
+	shards = wait_for_shards(executor, shards_path, poll_interval, max_polls)
+	return shards['states'], shards['merge_state']
+
+def gen_embeddings_sharded(executor, num_shards=4, shards_path='data/shards_gen_embeds.json',
+							poll_interval=60, max_polls=None):
+	"""
+	Generate embeddings across `num_shards` jobs then merge them into one file
+	"""
+	return run_sharded(executor,
+						script_name="generate_embeddings",
+						task_name="gen_embeds",
+						merge_task_name="merge_embeds",
+						num_shards=num_shards,
+						shards_path=shards_path,
+						poll_interval=poll_interval,
+						max_polls=max_polls,
+						accelerator_type='NVIDIA-TESLA-K80',
+						master_type='n1-standard-4',
+						scale_tier='CUSTOM')
@@ -36,15 +36,19 @@ def submit_job(script_name,
 			scale_tier = None, 
 			extra_args=None, 
 			master_type=None, 
-			accelerator_type=None):
+			accelerator_type=None,
+			job_name=None):
 	"""
 	Submit a job to the AI platform
+
+	Returns the job name if the job was created, otherwise None
 	"""
 
 	creds = get_creds()
-	project_id = 'projects/{}'.format(project_id)
+	parent = 'projects/{}'.format(project_id)
 	
-	job_name = task_name+"_" + datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+	if not job_name:
+		job_name = task_name+"_" + datetime.datetime.now().strftime("%y%m%d_%H%M%S")
 
 	args = ['--task', task_name]
 
@@ -74,13 +78,54 @@ def submit_job(script_name,
 		
 	job_spec = {"jobId": job_name, "trainingInput": training_inputs}
 	cloudml = discovery.build("ml", "v1", cache_discovery=False, credentials=creds)
-	request = cloudml.projects().jobs().create(body=job_spec, parent=project_id)
+	request = cloudml.projects().jobs().create(body=job_spec, parent=parent)
 	try:
 		response = request.execute()
 	except HttpError as err:
 		logging.error('There was an error creating the training job.'
 					  ' Check the details:')
 		logging.error(err._get_reason())
+		return None
+	return job_name
+
+def get_job_state(job_name):
+	"""
+	Get the state of an AI platform job, e.g. `QUEUED`, `RUNNING` or `SUCCEEDED`
+
+	A job that can't be found is `FAILED`, other request errors are `STATE_UNSPECIFIED`
+	"""
+	creds = get_creds()
+	cloudml = discovery.build("ml", "v1", cache_discovery=False, credentials=creds)
+	request = cloudml.projects().jobs().get(name='projects/{}/jobs/{}'.format(project_id, job_name))
+	try:
+		response = request.execute()
+	except HttpError as err:
+		if err.resp.status == 404:
+			logging.error(f'Job {job_name} was not found')
+			return 'FAILED'
+		logging.error(f'There was an error getting the state of {job_name}.'
+					  ' Check the details:')
+		logging.error(err._get_reason())
+		return 'STATE_UNSPECIFIED'
+	return response.get('state', 'STATE_UNSPECIFIED')
+
+class AIPlatformExecutor:
+	"""
+	Submit jobs to the AI platform
+
+	Shares its interface with `LocalExecutor` so the sharded jobs in `shard_jobs`
+		can run on either backend
+	"""
+	def submit(self, script_name, task_name, job_name=None, extra_args=None, **job_kwargs):
+		return submit_job(script_name, task_name, extra_args=extra_args,
+							job_name=job_name, **job_kwargs)
+
+	def get_state(self, job_name):
+		return get_job_state(job_name)
+
+def scrape_lyrics_Task(event, context,):
+	return submit_job(task_name="scrape_lyrics",
+						script_name="scrape_genius")
 
 def gen_embeddings_Task(event, context,):
 	return submit_job(task_name="gen_embeds",
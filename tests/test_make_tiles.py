@@ -0,0 +1,115 @@
+import json
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sklearn')
+Image = pytest.importorskip('PIL.Image')
+pytest.importorskip('matplotlib')
+pytest.importorskip('seaborn')
+
+from scripts.make_tiles import (build_tile_jobs, get_bounds, get_dirty_tiles, in_bounds,
+								make_tiles, touched_tiles, world_to_pixel)
+
+BOUNDS = {'min_x': 0., 'max_y': 1., 'side': 1.}
+
+def make_song(i, embedding, artist='Joji'):
+	return {'url': f'https://genius.com/song-{i}', 'artist': artist, 'title': f'song {i}',
+			'album': 'https://images.genius.com/cover.png', 'lyrics': 'la la',
+			'embedding': list(embedding)}
+
+@pytest.fixture
+def songs(tmp_path, monkeypatch):
+	"""
+	Songs spread over the plot, with the album and artist images already downloaded
+	"""
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / 'images').mkdir()
+	Image.new('RGBA', (60, 60), (255, 0, 0, 255)).save(tmp_path / 'images' / 'cover.png')
+	Image.new('RGBA', (300, 300), (0, 0, 255, 255)).save(tmp_path / 'images' / 'joji.png')
+
+	embeddings = np.random.RandomState(0).normal(size=(40, 8))
+	return [make_song(i, emb, artist='Joji' if i % 2 else 'Someone Else')
+				for i, emb in enumerate(embeddings)]
+
+def tiles_on_disk(out_dir):
+	return sorted(os.path.relpath(os.path.join(root, name), out_dir)[:-len('.png')]
+					for root, _, names in os.walk(out_dir) for name in names if name.endswith('.png'))
+
+def test_world_to_pixel_puts_origin_top_left():
+	assert world_to_pixel(0., 1., 1, BOUNDS) == (0., 0.)
+	assert world_to_pixel(.5, .5, 1, BOUNDS) == (256., 256.)
+	assert world_to_pixel(1., 0., 2, BOUNDS) == (1024., 1024.)
+
+def test_touched_tiles_clips_to_grid():
+	assert touched_tiles(10, 10, 1, 0) == [(0, 0)]
+	assert touched_tiles(250, 10, 1, 25) == [(0, 0), (1, 0)]
+	assert touched_tiles(10, 10, 1, 25) == [(0, 0)]
+	assert len(touched_tiles(256, 256, 1, 1000)) == 4
+
+def test_bounds_cover_every_song(songs):
+	for song in songs:
+		song['pca_emb'] = song['embedding'][:2]
+	bounds = get_bounds(songs)
+	assert all(in_bounds(song, bounds) for song in songs)
+
+def test_marker_reaches_into_empty_neighbouring_tile():
+	### The only song is well inside the left tile, its marker spills into the empty right tile
+	song = make_song(0, [0])
+	song['pca_emb'] = [.9, .4]
+	jobs = build_tile_jobs([song], {'Joji': [.49, .9]}, {song['album']: 'cover.png'}, 1,
+							BOUNDS, 'tiles', detail_zoom=1)
+
+	assert set(jobs) == {(1, 0, 0), (1, 1, 0)}
+	assert jobs[(1, 1, 0)]['covers'] == []
+	(left_x, _, _, _, _), = jobs[(1, 0, 0)]['artists']
+	(right_x, _, _, _, _), = jobs[(1, 1, 0)]['artists']
+	assert left_x - right_x == 256
+
+def test_dirty_tiles_for_new_song():
+	song = make_song(0, [0])
+	song['pca_emb'] = [.9, .1]
+	centers = {'Joji': [.5, .5]}
+	dirty = get_dirty_tiles([song], centers, centers, BOUNDS, max_zoom=2, detail_zoom=2)
+
+	### Below detail_zoom the song is a single point, at detail_zoom its cover spans no edge
+	assert dirty == {(0, 0, 0), (1, 0, 0), (2, 0, 0)}
+
+def test_dirty_tiles_for_moved_marker():
+	dirty = get_dirty_tiles([], {'Joji': [.9, .1]}, {'Joji': [.1, .9]}, BOUNDS,
+							max_zoom=1, detail_zoom=2, marker_size=2)
+
+	assert dirty == {(0, 0, 0), (1, 0, 0), (1, 1, 1)}
+
+def test_rebuild_removes_stale_tiles(songs, tmp_path):
+	make_tiles(songs[:4], out_dir='tiles', max_zoom=3, detail_zoom=2, processes=1)
+	old_tiles = tiles_on_disk(tmp_path / 'tiles')
+	make_tiles(songs, out_dir='tiles', rebuild=True, max_zoom=3, detail_zoom=2, processes=1)
+
+	with open(tmp_path / 'tiles' / 'manifest.json') as f:
+		manifest = json.load(f)
+	### The wider spread of songs changes the grid, so some old tiles must be gone
+	assert set(old_tiles) - set(manifest['tiles'])
+	assert tiles_on_disk(tmp_path / 'tiles') == sorted(manifest['tiles'])
+
+def test_incremental_run_keeps_coordinates(songs, tmp_path, capsys):
+	old_songs, new_song = songs[:-1], songs[-1]
+	new_song['embedding'] = np.mean([song['embedding'] for song in old_songs], axis=0).tolist()
+	make_tiles(old_songs, out_dir='tiles', max_zoom=3, detail_zoom=2, processes=1)
+	with open(tmp_path / 'tiles' / 'manifest.json') as f:
+		old_manifest = json.load(f)
+	old_coordinates = [song['pca_emb'] for song in old_songs]
+	capsys.readouterr()
+
+	### Adding a song would move every song if PCA were refit
+	make_tiles(old_songs + [new_song], out_dir='tiles', max_zoom=3, detail_zoom=2, processes=1)
+	with open(tmp_path / 'tiles' / 'manifest.json') as f:
+		manifest = json.load(f)
+
+	assert [song['pca_emb'] for song in old_songs] == old_coordinates
+	assert manifest['projection'] == old_manifest['projection']
+	assert manifest['bounds'] == old_manifest['bounds']
+	assert new_song['url'] in manifest['songs']
+	rendered, total = map(int, capsys.readouterr().out.split('Rendering ')[1].split(' tiles')[0].split(' of '))
+	assert 0 < rendered < total
+	assert tiles_on_disk(tmp_path / 'tiles') == sorted(manifest['tiles'])
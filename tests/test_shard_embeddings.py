@@ -0,0 +1,40 @@
+import json
+import pytest
+from scripts.shard_embeddings import embeddings_file_name, merge_embeddings, shard_artists
+from scripts.utils import upload_blob
+
+ARTISTS = ['Mac Miller', 'Joji', 'Smino', 'MF DOOM', 'Amine', 'Kanye West', 'Rich Brian']
+
+@pytest.mark.parametrize('num_shards', [1, 2, 3, 7, 10])
+def test_shard_artists_is_disjoint_and_complete(num_shards):
+    shards = [shard_artists(ARTISTS, shard_index, num_shards) for shard_index in range(num_shards)]
+
+    all_sharded = [artist for shard in shards for artist in shard]
+    assert sorted(all_sharded) == sorted(ARTISTS)
+    assert len(all_sharded) == len(set(all_sharded))
+
+def test_shard_artists_ignores_input_order():
+    assert shard_artists(ARTISTS, 1, 3) == shard_artists(list(reversed(ARTISTS)), 1, 3)
+
+def test_merge_embeddings_round_trips_locally(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+
+    data = {artist: {'album': [{'lyrics': 'la', 'embedding': [[float(i)]]}]}
+                for i, artist in enumerate(ARTISTS)}
+    for shard_index in range(3):
+        with open(tmp_path / 'data' / embeddings_file_name(shard_index, 3), 'w') as f:
+            json.dump({artist: data[artist] for artist in shard_artists(data, shard_index, 3)}, f)
+
+    merge_embeddings(3, run_locally=True)
+
+    with open(tmp_path / 'data' / embeddings_file_name()) as f:
+        assert json.load(f) == data
+
+def test_upload_blob_locally_without_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'embs.json').write_text('{}')
+
+    upload_blob('embs.json', run_locally=True)
+
+    assert (tmp_path / 'embs.json').read_text() == '{}'
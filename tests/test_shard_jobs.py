@@ -0,0 +1,85 @@
+import json
+import os
+import pytest
+from submit_jobs.local_executor import LocalExecutor
+from submit_jobs.shard_jobs import check_shards, run_sharded, submit_shards, wait_for_shards
+
+STUB_SCRIPT = '''
+import argparse, json, os
+parser = argparse.ArgumentParser()
+parser.add_argument('--task')
+parser.add_argument('--shard-index', type=int, default=0)
+parser.add_argument('--num-shards', type=int, default=1)
+parser.add_argument('--fail-shard', type=int, default=None)
+parser.add_argument('--run-locally', action='store_true')
+args = parser.parse_args()
+
+if args.task == 'merge':
+	merged = {}
+	for shard_index in range(args.num_shards):
+		with open(f'data/shard{shard_index}.json') as f:
+			merged.update(json.load(f))
+	with open('data/merged.json', 'w') as f:
+		json.dump(merged, f)
+else:
+	if args.shard_index == args.fail_shard:
+		raise RuntimeError('shard failed')
+	os.makedirs('data', exist_ok=True)
+	with open(f'data/shard{args.shard_index}.json', 'w') as f:
+		json.dump({f'artist{args.shard_index}': args.run_locally}, f)
+'''
+
+@pytest.fixture
+def executor(tmp_path, monkeypatch):
+	package = tmp_path / 'stub_scripts'
+	package.mkdir()
+	(package / '__init__.py').write_text('')
+	(package / 'stub.py').write_text(STUB_SCRIPT)
+	monkeypatch.syspath_prepend(str(tmp_path))
+	monkeypatch.chdir(tmp_path)
+
+	executor = LocalExecutor(processes=2, package='stub_scripts')
+	yield executor
+	executor.shutdown()
+
+def test_run_sharded_merges_shards(executor, tmp_path):
+	states, merge_state = run_sharded(executor, 'stub', 'gen', 'merge', 2, 'data/shards.json',
+									poll_interval=.1, max_polls=100)
+
+	assert states == ['SUCCEEDED', 'SUCCEEDED']
+	assert merge_state == 'SUCCEEDED'
+	with open(tmp_path / 'data' / 'merged.json') as f:
+		assert json.load(f) == {'artist0': True, 'artist1': True}
+
+def test_run_sharded_skips_merge_when_a_shard_fails(executor, tmp_path):
+	states, merge_state = run_sharded(executor, 'stub', 'gen', 'merge', 3, 'data/shards.json',
+									poll_interval=.1, max_polls=100,
+									extra_args=['--fail-shard', '1'])
+
+	assert states == ['SUCCEEDED', 'FAILED', 'SUCCEEDED']
+	assert merge_state is None
+	assert not os.path.exists(tmp_path / 'data' / 'merged.json')
+
+def test_wait_for_shards_resumes_from_saved_record(executor, tmp_path):
+	submit_shards(executor, 'stub', 'gen', 'merge', 2, 'data/shards.json')
+	shards = wait_for_shards(executor, 'data/shards.json', poll_interval=.1, max_polls=100)
+
+	assert shards['states'] == ['SUCCEEDED', 'SUCCEEDED']
+	assert shards['merge_state'] == 'SUCCEEDED'
+	with open(tmp_path / 'data' / 'shards.json') as f:
+		assert json.load(f) == shards
+
+def test_check_shards_fails_jobs_it_cannot_find(executor):
+	submit_shards(executor, 'stub', 'gen', 'merge', 2, 'data/shards.json')
+
+	### A new local executor can't see jobs started by another one
+	other_executor = LocalExecutor(package='stub_scripts')
+	shards = check_shards(other_executor, 'data/shards.json')
+	other_executor.shutdown()
+
+	assert shards['states'] == ['FAILED', 'FAILED']
+	assert shards['merge_job'] is None
+
+def test_submit_shards_rejects_no_shards(executor):
+	with pytest.raises(ValueError):
+		submit_shards(executor, 'stub', 'gen', 'merge', 0, 'data/shards.json')